@@ -5,15 +5,56 @@ Analyzes packet capture to understand VCM-IHU communication patterns
 """
 
 import csv
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+import sys
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Set, NamedTuple
 from collections import defaultdict
+from bisect import bisect_right
+from functools import lru_cache
 
-IHU_IP = "198.18.34.1"
-VCM_IP = "198.18.32.1"
-ACK_DATA = "02700000"
+# Interned so comparisons against interned packet fields hit the identity fast path
+IHU_IP = sys.intern("198.18.34.1")
+VCM_IP = sys.intern("198.18.32.1")
+ACK_DATA = sys.intern("02700000")
+WIFI_MESSAGE_TYPE = "a408"  # Subheader category of wifi password/status messages
 
-@dataclass
+# First packet number of phases 2-5 in the reference capture
+PHASE_STARTS = [17, 43, 55, 76]
+
+MIN_PAYLOAD_HEX = 24  # Minimum: 7+1+3+1 = 12 bytes = 24 hex chars
+
+# Hex digit -> nibble value, for the fixed single-byte payload fields.
+# Indexing single characters avoids allocating a 2-char slice per field.
+_HEX_NIBBLE = {c: int(c, 16) for c in "0123456789abcdefABCDEF"}
+
+
+def _parse_payload_fields(payload: str) -> Tuple[str, int, str, int, str]:
+    """Split a hex payload into (header, length, subheader, sequence, data)"""
+    try:
+        return (
+            payload[:14],  # 7 bytes
+            _HEX_NIBBLE[payload[14]] << 4 | _HEX_NIBBLE[payload[15]],  # 1 byte
+            payload[16:22],  # 3 bytes
+            _HEX_NIBBLE[payload[22]] << 4 | _HEX_NIBBLE[payload[23]],  # 1 byte
+            payload[24:],  # Rest is data
+        )
+    except KeyError as e:
+        # Same error type as int(x, 16) and the compiled parser
+        raise ValueError(f"invalid hex digit: {e.args[0]!r}") from None
+
+
+try:
+    # Optional compiled parser (see analyze_protocol_c.pyx); pure Python otherwise
+    from analyze_protocol_c import parse_payload_fields as _parse_payload_fields
+except ImportError:
+    pass
+
+# Captures repeat the same payloads constantly (ACKs, pings, periodic
+# broadcasts); a bounded memo keeps memory flat on large captures
+_parse_payload_fields = lru_cache(maxsize=1024)(_parse_payload_fields)
+
+
+@dataclass(slots=True)
 class Packet:
     seq_number: int
     time: str
@@ -32,109 +73,120 @@ class Packet:
     sequence: int = 0
     data: str = ""
     
-    @property
-    def direction(self) -> str:
-        if self.source == IHU_IP:
-            return "IHU->VCM"
-        return "VCM->IHU"
-    
-    @property
-    def is_ack(self) -> bool:
-        return self.data == ACK_DATA
+    # Derived fields, computed once instead of on every access
+    direction: str = field(init=False, default="")
+    is_ack: bool = field(init=False, default=False)
+    message_type: str = field(init=False, default="")  # First 2 bytes of subheader
     
-    @property
-    def message_type(self) -> str:
-        """Extract message type from subheader first 2 bytes"""
-        if len(self.subheader) >= 4:
-            return self.subheader[:4]
-        return ""
+    def __post_init__(self):
+        self.direction = "IHU->VCM" if self.source == IHU_IP else "VCM->IHU"
     
     def parse_payload(self):
         """Parse the payload into components"""
-        if len(self.payload) < 22:  # Minimum: 7+1+3+1 = 12 bytes = 24 hex chars
+        if len(self.payload) < MIN_PAYLOAD_HEX:
             return
         
-        self.header = self.payload[:14]  # 7 bytes
-        self.payload_length = int(self.payload[14:16], 16)  # 1 byte
-        self.subheader = self.payload[16:22]  # 3 bytes
-        self.sequence = int(self.payload[22:24], 16)  # 1 byte
-        self.data = self.payload[24:]  # Rest is data
+        (self.header, self.payload_length, self.subheader,
+         self.sequence, self.data) = _parse_payload_fields(self.payload)
+        self.is_ack = self.data == ACK_DATA
+        self.message_type = self.subheader[:4]
 
 
-def load_packets(csv_path: str) -> List[Packet]:
-    """Load packets from CSV file"""
-    packets = []
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
+def iter_packets(csv_path: str) -> Iterator[Packet]:
+    """Stream parsed packets from CSV file one row at a time"""
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader, None)
+        if columns is None:
+            return
+        # Resolve column positions once instead of building a dict per row
+        (i_seq, i_time, i_src, i_dst, i_proto,
+         i_sport, i_dport, i_len, i_payload) = (
+            columns.index(name) for name in (
+                'seq_number', 'time', 'source', 'destination', 'protocol',
+                'source_port', 'destination_port', 'length', 'payload'))
         for row in reader:
+            if not row:
+                continue
             pkt = Packet(
-                seq_number=int(row['seq_number']),
-                time=row['time'],
-                source=row['source'],
-                destination=row['destination'],
-                protocol=row['protocol'],
-                source_port=int(row['source_port']),
-                destination_port=int(row['destination_port']),
-                length=int(row['length']),
-                payload=row['payload']
+                seq_number=int(row[i_seq]),
+                time=row[i_time],
+                # Endpoints repeat on every row: share one str object each
+                source=sys.intern(row[i_src]),
+                destination=sys.intern(row[i_dst]),
+                protocol=sys.intern(row[i_proto]),
+                source_port=int(row[i_sport]),
+                destination_port=int(row[i_dport]),
+                length=int(row[i_len]),
+                payload=row[i_payload]
             )
             pkt.parse_payload()
-            packets.append(pkt)
-    return packets
+            yield pkt
+
+
+def load_packets(csv_path: str) -> List[Packet]:
+    """Load packets from CSV file"""
+    return list(iter_packets(csv_path))
+
+
+@dataclass(slots=True)
+class TypeStats:
+    """Per-subheader totals gathered while streaming a capture"""
+    count: int = 0
+    acks: int = 0
+    directions: Set[str] = field(default_factory=set)
+    non_ack: List[Packet] = field(default_factory=list)
 
 
 def analyze_message_types(packets: List[Packet]) -> Dict[str, List[Packet]]:
     """Group packets by message type (subheader)"""
     by_type = defaultdict(list)
     for pkt in packets:
-        key = f"{pkt.subheader}"
-        by_type[key].append(pkt)
+        by_type[pkt.subheader].append(pkt)
     return dict(by_type)
 
 
-def analyze_conversations(packets: List[Packet]) -> List[List[Packet]]:
+def analyze_conversations(packets: Iterable[Packet]) -> List[List[Packet]]:
     """Group packets into request-response conversations"""
     conversations = []
-    i = 0
-    while i < len(packets):
-        conv = [packets[i]]
-        # Look for related packets (same subheader, sequence matching)
-        base_subheader = packets[i].subheader
-        base_seq = packets[i].sequence
-        
-        j = i + 1
-        while j < len(packets) and j < i + 5:  # Look ahead max 5 packets
-            if packets[j].subheader == base_subheader:
-                conv.append(packets[j])
-                if packets[j].is_ack and packets[j].direction != packets[i].direction:
-                    break
-            j += 1
-        
-        conversations.append(conv)
-        i += 1
+    open_convs: Dict[str, List[Packet]] = {}  # subheader -> conversation in progress
+    for pkt in packets:
+        conv = open_convs.get(pkt.subheader)
+        if conv is None:
+            conv = open_convs[pkt.subheader] = []
+            conversations.append(conv)  # Ordered by first packet
+        conv.append(pkt)
+        # An ACK from the other side closes the conversation
+        if pkt.is_ack and pkt.direction != conv[0].direction:
+            del open_convs[pkt.subheader]
     
     return conversations
 
 
-def find_state_transitions(packets: List[Packet]) -> List[Dict]:
+class Transition(NamedTuple):
+    """A non-ACK packet in the protocol flow"""
+    packet_num: int
+    time: str
+    direction: str
+    subheader: str
+    sequence: int
+    data: str
+    payload: str
+
+
+def find_state_transitions(packets: Iterable[Packet]) -> List[Transition]:
     """Identify potential state transitions based on packet patterns"""
     transitions = []
     
-    for i, pkt in enumerate(packets):
+    for pkt in packets:
         # Skip ACKs for transition analysis
         if pkt.is_ack:
             continue
         
-        transition = {
-            'packet_num': pkt.seq_number,
-            'time': pkt.time,
-            'direction': pkt.direction,
-            'subheader': pkt.subheader,
-            'sequence': pkt.sequence,
-            'data': pkt.data,
-            'payload': pkt.payload
-        }
-        transitions.append(transition)
+        transitions.append(Transition(
+            pkt.seq_number, pkt.time, pkt.direction, pkt.subheader,
+            pkt.sequence, pkt.data, pkt.payload
+        ))
     
     return transitions
 
@@ -146,7 +198,7 @@ def decode_ssid_data(hex_data: str) -> str:
         data = hex_data
         result = bytes.fromhex(data).decode('utf-8', errors='replace')
         return result
-    except:
+    except ValueError:
         return hex_data
 
 
@@ -155,86 +207,111 @@ def main():
     print("VCM Protocol Analysis Report")
     print("=" * 80)
     
-    packets = load_packets('../pcap_utils/enable_wifi.csv')
+    # Collect every per-packet statistic in a single streaming sweep;
+    # ACK packets are only counted, never retained
+    total = 0
+    dir_counts = [0, 0]  # [VCM->IHU, IHU->VCM]
+    acks = 0
+    by_type = defaultdict(TypeStats)
+    flow = []
+    data_counts = defaultdict(list)
+    wifi_pkts = []
+    phase_subheaders = [set() for _ in range(len(PHASE_STARTS) + 1)]
+    for pkt in iter_packets('../pcap_utils/enable_wifi.csv'):
+        total += 1
+        dir_counts[pkt.source == IHU_IP] += 1
+        stats = by_type[pkt.subheader]
+        stats.count += 1
+        stats.directions.add(pkt.direction)
+        if pkt.is_ack:
+            acks += 1
+            stats.acks += 1
+        else:
+            stats.non_ack.append(pkt)
+            flow.append(pkt)
+            # Find repeated messages
+            data_counts[pkt.payload].append(pkt)
+        # Messages with 'a408' subheader (wifi password related)
+        if pkt.message_type == WIFI_MESSAGE_TYPE:
+            wifi_pkts.append(pkt)
+        phase_subheaders[bisect_right(PHASE_STARTS, pkt.seq_number)].add(pkt.subheader)
     
-    print(f"\nTotal packets: {len(packets)}")
+    print(f"\nTotal packets: {total}")
     
     # Count by direction
-    ihu_to_vcm = [p for p in packets if p.direction == "IHU->VCM"]
-    vcm_to_ihu = [p for p in packets if p.direction == "VCM->IHU"]
-    print(f"IHU -> VCM: {len(ihu_to_vcm)}")
-    print(f"VCM -> IHU: {len(vcm_to_ihu)}")
+    print(f"IHU -> VCM: {dir_counts[True]}")
+    print(f"VCM -> IHU: {dir_counts[False]}")
     
     # ACK analysis
-    acks = [p for p in packets if p.is_ack]
-    print(f"ACK packets: {len(acks)}")
+    print(f"ACK packets: {acks}")
     
     print("\n" + "=" * 80)
     print("MESSAGE TYPES (by subheader)")
     print("=" * 80)
     
-    by_type = analyze_message_types(packets)
-    for subheader, pkts in sorted(by_type.items()):
-        directions = set(p.direction for p in pkts)
-        ack_count = sum(1 for p in pkts if p.is_ack)
-        non_ack = [p for p in pkts if not p.is_ack]
-        print(f"\nSubheader: {subheader}")
-        print(f"  Count: {len(pkts)}, ACKs: {ack_count}")
-        print(f"  Directions: {directions}")
-        print(f"  Non-ACK data patterns:")
-        for p in non_ack[:3]:  # Show first 3
-            print(f"    [{p.seq_number}] {p.direction}: seq={p.sequence:02x}, data={p.data}")
+    # Per-packet report lines are buffered and written once per section
+    out = []
+    emit = out.append
+    
+    for subheader, stats in sorted(by_type.items()):
+        emit(f"\nSubheader: {subheader}\n")
+        emit(f"  Count: {stats.count}, ACKs: {stats.acks}\n")
+        emit(f"  Directions: {stats.directions}\n")
+        emit("  Non-ACK data patterns:\n")
+        for p in stats.non_ack[:3]:  # Show first 3
+            emit(f"    [{p.seq_number}] {p.direction}: seq={p.sequence:02x}, data={p.data}\n")
+    sys.stdout.write(''.join(out))
+    out.clear()
     
     print("\n" + "=" * 80)
     print("FULL PACKET FLOW (non-ACK)")
     print("=" * 80)
     
-    transitions = find_state_transitions(packets)
+    transitions = find_state_transitions(flow)
     prev_time = None
     for t in transitions:
         time_delta = ""
         if prev_time:
             # Simple time delta (just for display)
             time_delta = f" (Δ from prev)"
-        prev_time = t['time']
+        prev_time = t.time
         
-        arrow = ">>>" if t['direction'] == "IHU->VCM" else "<<<"
-        print(f"[{t['packet_num']:2d}] {t['time']} {arrow} sub={t['subheader']} seq={t['sequence']:02x} data={t['data']}")
+        arrow = ">>>" if t.direction == "IHU->VCM" else "<<<"
+        emit(f"[{t.packet_num:2d}] {t.time} {arrow} sub={t.subheader} seq={t.sequence:02x} data={t.data}\n")
+    sys.stdout.write(''.join(out))
+    out.clear()
     
     print("\n" + "=" * 80)
     print("PERIODIC MESSAGE ANALYSIS")
     print("=" * 80)
     
-    # Find repeated messages
-    data_counts = defaultdict(list)
-    for t in transitions:
-        data_counts[t['payload']].append(t['packet_num'])
-    
     print("\nRepeated messages (potential periodic broadcasts):")
-    for payload, pkt_nums in sorted(data_counts.items(), key=lambda x: -len(x[1])):
-        if len(pkt_nums) > 1:
-            pkt = next(p for p in packets if p.payload == payload)
-            print(f"  {payload}")
-            print(f"    Count: {len(pkt_nums)}, Packets: {pkt_nums}")
-            print(f"    Direction: {pkt.direction}, Subheader: {pkt.subheader}")
+    repeated = [(payload, pkts) for payload, pkts in data_counts.items() if len(pkts) > 1]
+    repeated.sort(key=lambda x: len(x[1]), reverse=True)
+    for payload, pkts in repeated:
+        pkt = pkts[0]
+        emit(f"  {payload}\n")
+        emit(f"    Count: {len(pkts)}, Packets: {[p.seq_number for p in pkts]}\n")
+        emit(f"    Direction: {pkt.direction}, Subheader: {pkt.subheader}\n")
+    sys.stdout.write(''.join(out))
+    out.clear()
     
     print("\n" + "=" * 80)
     print("WIFI-RELATED MESSAGES ANALYSIS")
     print("=" * 80)
     
-    # Messages with 'a408' subheader (wifi password related)
-    wifi_pkts = [p for p in packets if 'a408' in p.subheader]
-    print(f"\nWifi-related packets (subheader contains a408): {len(wifi_pkts)}")
+    print(f"\nWifi-related packets (message type {WIFI_MESSAGE_TYPE}): {len(wifi_pkts)}")
     for p in wifi_pkts:
         decoded = ""
         if len(p.data) > 8:
             # Try to decode after the first 8 chars
             try:
-                raw = bytes.fromhex(p.data[8:])
-                decoded = f" -> decoded: {raw}"
-            except:
+                decoded = f" -> decoded: {bytes.fromhex(p.data[8:])}"
+            except ValueError:
                 pass
-        print(f"  [{p.seq_number}] {p.direction}: {p.payload}{decoded}")
+        emit(f"  [{p.seq_number}] {p.direction}: {p.payload}{decoded}\n")
+    sys.stdout.write(''.join(out))
+    out.clear()
     
     print("\n" + "=" * 80)
     print("STATE MACHINE HYPOTHESIS")
@@ -243,26 +320,22 @@ def main():
     # Group by time phases
     print("\nPhase analysis based on timing and message patterns:")
     
-    phase1 = [p for p in packets if p.seq_number <= 16]
-    phase2 = [p for p in packets if 17 <= p.seq_number <= 42]
-    phase3 = [p for p in packets if 43 <= p.seq_number <= 54]
-    phase4 = [p for p in packets if 55 <= p.seq_number <= 75]
-    phase5 = [p for p in packets if p.seq_number >= 76]
+    phase1, phase2, phase3, phase4, phase5 = phase_subheaders
     
     print(f"\nPhase 1 (pkts 1-16): Initial handshake")
-    print(f"  Unique subheaders: {set(p.subheader for p in phase1)}")
+    print(f"  Unique subheaders: {phase1}")
     
     print(f"\nPhase 2 (pkts 17-42): Setup/Configuration")
-    print(f"  Unique subheaders: {set(p.subheader for p in phase2)}")
+    print(f"  Unique subheaders: {phase2}")
     
     print(f"\nPhase 3 (pkts 43-54): SSID Scanning (not connected)")
-    print(f"  Unique subheaders: {set(p.subheader for p in phase3)}")
+    print(f"  Unique subheaders: {phase3}")
     
     print(f"\nPhase 4 (pkts 55-75): WiFi Password Entry & Connection")
-    print(f"  Unique subheaders: {set(p.subheader for p in phase4)}")
+    print(f"  Unique subheaders: {phase4}")
     
     print(f"\nPhase 5 (pkts 76-91): Connected State Broadcasting")
-    print(f"  Unique subheaders: {set(p.subheader for p in phase5)}")
+    print(f"  Unique subheaders: {phase5}")
 
 
 if __name__ == "__main__":
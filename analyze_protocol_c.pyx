@@ -0,0 +1,43 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+VCM Protocol Analyzer - optional compiled payload parser
+
+Drop-in replacement for analyze_protocol._parse_payload_fields. Build in place with:
+
+    cythonize -i analyze_protocol_c.pyx
+
+analyze_protocol falls back to its pure-Python parser when this module is not built.
+"""
+
+# ASCII code -> nibble value, -1 for non-hex characters
+cdef int hex2[256]
+
+cdef int _i
+for _i in range(256):
+    hex2[_i] = -1
+for _i in range(10):
+    hex2[ord('0') + _i] = _i
+for _i in range(6):
+    hex2[ord('a') + _i] = 10 + _i
+    hex2[ord('A') + _i] = 10 + _i
+
+
+cdef inline int _hex_byte(Py_UCS4 hi, Py_UCS4 lo) except -1:
+    cdef int h = hex2[hi] if hi < 256 else -1
+    cdef int l = hex2[lo] if lo < 256 else -1
+    if h < 0 or l < 0:
+        raise ValueError(f"invalid hex byte: {hi}{lo}")
+    return (h << 4) | l
+
+
+cpdef tuple parse_payload_fields(str payload):
+    """Split a hex payload into (header, length, subheader, sequence, data)"""
+    if len(payload) < 24:
+        raise ValueError("payload shorter than 12 bytes")
+    return (
+        payload[:14],
+        _hex_byte(payload[14], payload[15]),
+        payload[16:22],
+        _hex_byte(payload[22], payload[23]),
+        payload[24:],
+    )
@@ -6,13 +6,14 @@ This client can replay the captured traffic or send custom commands.
 """
 
 import asyncio
+import selectors
 import socket
 import time
 import sys
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union, Iterator, Callable, Dict
 from dataclasses import dataclass
 
-from vcm_protocol import parse_message, create_ack, VCMMessage
+from vcm_protocol import parse_bytes, create_ack, VCMMessage
 
 
 # Network configuration
@@ -20,8 +21,20 @@ VCM_IP = "127.0.0.1"  # localhost for testing, change to 198.18.32.1 for real VC
 VCM_PORT = 50000
 IHU_PORT = 50000  # IHU listen port
 
+# Captured IHU payloads, decoded once at import
+PING_0D = bytes.fromhex("00a4040d00000008a40d002802000000")        # ping 0d
+PING_0F = bytes.fromhex("00a3030f00000008a30f002902000000")        # ping 0f
+PING_0D_2 = bytes.fromhex("00a4040d00000008a40d003002000000")      # ping 0d, second round
+PING_0F_2 = bytes.fromhex("00a3030f00000008a30f003102000000")      # ping 0f, second round
+SETUP_TRIGGER = bytes.fromhex("00a4040000000009a40002320202000020")
+SETUP_11_RESPONSE = bytes.fromhex("00a3031100000009a31102500204000000")      # seq 50
+SETUP_10_RESPONSE = bytes.fromhex("00a3031000000009a31002510204000000")      # seq 51
+SETUP_08_RESPONSE = bytes.fromhex("00a3030800000009a30802520204000000")      # seq 52
+SETUP_08_RESPONSE_80 = bytes.fromhex("00a3030800000009a30802540204000080")   # seq 54, flag 80
+WIFI_PASSWORD = bytes.fromhex("00a4040800000018a408024b02020000086c61696b696e617319d195cdd185cc")  # "laikinas"
+CONNECT_COMPLETE_RESPONSE = bytes.fromhex("00a3030800000009a30802720204000080")  # seq 72, flag 80
 
-@dataclass
+@dataclass(slots=True)
 class CapturedPacket:
     """A packet from the capture file"""
     seq_number: int
@@ -32,23 +45,26 @@ class CapturedPacket:
     is_from_ihu: bool
 
 
-def load_captured_packets(csv_path: str) -> List[CapturedPacket]:
-    """Load packets from CSV file"""
+def iter_captured_packets(csv_path: str) -> Iterator[CapturedPacket]:
+    """Stream packets from CSV file one row at a time"""
     import csv
-    packets = []
     with open(csv_path, 'r') as f:
         reader = csv.DictReader(f)
         for row in reader:
             is_from_ihu = row['source'] == "198.18.34.1"
-            packets.append(CapturedPacket(
+            yield CapturedPacket(
                 seq_number=int(row['seq_number']),
                 time=row['time'],
                 source=row['source'],
                 destination=row['destination'],
                 payload=row['payload'],
                 is_from_ihu=is_from_ihu
-            ))
-    return packets
+            )
+
+
+def load_captured_packets(csv_path: str) -> List[CapturedPacket]:
+    """Load packets from CSV file"""
+    return list(iter_captured_packets(csv_path))
 
 
 class IHUClient:
@@ -57,7 +73,9 @@ class IHUClient:
     def __init__(self, vcm_host: str = VCM_IP, vcm_port: int = VCM_PORT):
         self.vcm_host = vcm_host
         self.vcm_port = vcm_port
+        self.vcm_addr = (vcm_host, vcm_port)
         self.sock: Optional[socket.socket] = None
+        self._sel: Optional[selectors.BaseSelector] = None
         self.responses: List[Tuple[str, float]] = []  # (payload, timestamp)
     
     def connect(self):
@@ -68,58 +86,124 @@ class IHUClient:
         self.sock.bind(('0.0.0.0', 0))
         local_port = self.sock.getsockname()[1]
         print(f"IHU client bound to port {local_port}")
+        
+        # Wait for responses through one selector instead of changing socket timeouts
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self.sock, selectors.EVENT_READ)
+    
+    def receive(self, timeout: float) -> Optional[bytes]:
+        """Wait up to timeout seconds for one datagram"""
+        if not self._sel.select(timeout):
+            return None
+        data, addr = self.sock.recvfrom(1024)
+        return data
     
-    def send(self, payload_hex: str) -> List[str]:
-        """Send a payload and collect responses"""
+    def send(self, payload: Union[str, bytes]) -> List[Tuple[bytes, Optional[VCMMessage]]]:
+        """Send a payload (hex string or raw bytes) and collect (raw, parsed) responses"""
         if not self.sock:
             self.connect()
         
         # Send the message
-        payload_bytes = bytes.fromhex(payload_hex)
-        self.sock.sendto(payload_bytes, (self.vcm_host, self.vcm_port))
+        if isinstance(payload, str):
+            payload = bytes.fromhex(payload)
+        self.sock.sendto(payload, self.vcm_addr)
         
-        msg = parse_message(payload_hex)
+        msg = parse_bytes(payload)
         print(f"IHU >>> VCM: {msg}")
         
         # Collect responses (with timeout)
         responses = []
-        try:
-            while True:
-                data, addr = self.sock.recvfrom(1024)
-                response_hex = data.hex()
-                responses.append(response_hex)
-                
-                resp_msg = parse_message(response_hex)
-                print(f"VCM >>> IHU: {resp_msg}")
-                
-                # If we got a non-ACK response, that's usually the end
-                if resp_msg and not resp_msg.is_ack:
-                    # Give a tiny bit more time for any follow-up
-                    self.sock.settimeout(0.1)
-        except socket.timeout:
-            pass
+        timeout = 2.0
+        while (data := self.receive(timeout)) is not None:
+            resp_msg = parse_bytes(data)
+            responses.append((data, resp_msg))
+            
+            print(f"VCM >>> IHU: {resp_msg}")
+            
+            # If we got a non-ACK response, that's usually the end
+            if resp_msg and not resp_msg.is_ack:
+                # Give a tiny bit more time for any follow-up
+                timeout = 0.1
         
-        self.sock.settimeout(2.0)  # Reset timeout
         return responses
     
-    def send_ack(self, payload_hex: str):
-        """Send an ACK for a received message"""
+    def send_ack(self, msg: Union[str, bytes, VCMMessage, None]):
+        """Send an ACK for a received message (hex payload, raw datagram or parsed message)"""
         if not self.sock:
             self.connect()
         
-        msg = parse_message(payload_hex)
+        if isinstance(msg, str):
+            msg = bytes.fromhex(msg)
+        if isinstance(msg, bytes):
+            msg = parse_bytes(msg)
         if msg:
             ack = create_ack(msg)
-            self.sock.sendto(ack.raw_bytes, (self.vcm_host, self.vcm_port))
+            self.sock.sendto(ack.buf, self.vcm_addr)
             print(f"IHU >>> VCM (ACK): {ack}")
     
     def close(self):
         """Close the socket"""
+        if self._sel:
+            self._sel.close()
+            self._sel = None
         if self.sock:
             self.sock.close()
             self.sock = None
 
 
+# ==================== Interactive Commands ====================
+
+def _cmd_send(client: IHUClient, args: str):
+    """Send a raw hex payload"""
+    if args:
+        client.send(args)
+    else:
+        print("Usage: send <hex_payload>")
+
+
+def _cmd_ping(client: IHUClient, args: str):
+    """Send handshake pings"""
+    print("Sending handshake pings...")
+    client.send(PING_0D)  # ping 0d
+    time.sleep(0.1)
+    client.send(PING_0F)  # ping 0f
+
+
+def _cmd_setup(client: IHUClient, args: str):
+    """Send setup trigger"""
+    print("Sending setup trigger...")
+    client.send(SETUP_TRIGGER)
+
+
+def _cmd_wifi(client: IHUClient, args: str):
+    """Send WiFi password"""
+    if args:
+        # Encode the password
+        password = args.encode('utf-8')
+        pwd_hex = password.hex()
+        pwd_len = len(password)
+        # Format: 00a4040800000018a408024b02020000 + len + password + extra
+        payload = f"00a4040800000018a408024b02020000{pwd_len:02x}{pwd_hex}19d195cdd185cc"
+        client.send(payload)
+    else:
+        # Use default from capture
+        client.send(WIFI_PASSWORD)
+
+
+def _cmd_replay(client: IHUClient, args: str):
+    """Replay full captured sequence"""
+    replay_captured_sequence(client)
+
+
+COMMANDS: Dict[str, Callable[[IHUClient, str], None]] = {
+    "send": _cmd_send,
+    "ping": _cmd_ping,
+    "setup": _cmd_setup,
+    "wifi": _cmd_wifi,
+    "replay": _cmd_replay,
+}
+
+
 def interactive_mode(client: IHUClient):
     """Interactive mode for manual testing"""
     print("\n" + "=" * 60)
@@ -148,39 +232,9 @@ def interactive_mode(client: IHUClient):
             if command == "quit" or command == "exit":
                 break
             
-            elif command == "send":
-                if args:
-                    client.send(args)
-                else:
-                    print("Usage: send <hex_payload>")
-            
-            elif command == "ping":
-                # Send handshake pings
-                print("Sending handshake pings...")
-                client.send("00a4040d00000008a40d002802000000")  # ping 0d
-                time.sleep(0.1)
-                client.send("00a3030f00000008a30f002902000000")  # ping 0f
-            
-            elif command == "setup":
-                print("Sending setup trigger...")
-                client.send("00a4040000000009a40002320202000020")
-            
-            elif command == "wifi":
-                if args:
-                    # Encode the password
-                    password = args.encode('utf-8')
-                    pwd_hex = password.hex()
-                    pwd_len = len(password)
-                    # Format: 00a4040800000018a408024b02020000 + len + password + extra
-                    payload = f"00a4040800000018a408024b02020000{pwd_len:02x}{pwd_hex}19d195cdd185cc"
-                    client.send(payload)
-                else:
-                    # Use default from capture
-                    client.send("00a4040800000018a408024b02020000086c61696b696e617319d195cdd185cc")
-            
-            elif command == "replay":
-                replay_captured_sequence(client)
-            
+            handler = COMMANDS.get(command)
+            if handler:
+                handler(client, args)
             else:
                 print(f"Unknown command: {command}")
         
@@ -200,21 +254,21 @@ def replay_captured_sequence(client: IHUClient):
     
     # Phase 1: Initial handshake
     print("\n[Phase 1] Initial Handshake")
-    client.send("00a4040d00000008a40d002802000000")
+    client.send(PING_0D)
     time.sleep(0.1)
-    client.send("00a3030f00000008a30f002902000000")
+    client.send(PING_0F)
     time.sleep(0.1)
     
     # Second round of pings
     print("\n[Phase 1] Second round of pings")
-    client.send("00a4040d00000008a40d003002000000")
+    client.send(PING_0D_2)
     time.sleep(0.1)
-    client.send("00a3030f00000008a30f003102000000")
+    client.send(PING_0F_2)
     time.sleep(0.1)
     
     # Phase 2: Setup trigger
     print("\n[Phase 2] Setup Sequence")
-    responses = client.send("00a4040000000009a40002320202000020")
+    responses = client.send(SETUP_TRIGGER)
     time.sleep(0.1)
     
     # VCM will send setup requests, we need to respond to them
@@ -222,19 +276,19 @@ def replay_captured_sequence(client: IHUClient):
     
     # Respond to a31102 (sequence 50)
     print("  Responding to setup requests...")
-    client.send("00a3031100000009a31102500204000000")
+    client.send(SETUP_11_RESPONSE)
     time.sleep(0.1)
     
     # Respond to a31002 (sequence 51)
-    client.send("00a3031000000009a31002510204000000")
+    client.send(SETUP_10_RESPONSE)
     time.sleep(0.1)
     
     # Respond to first a30802 (sequence 52)
-    client.send("00a3030800000009a30802520204000000")
+    client.send(SETUP_08_RESPONSE)
     time.sleep(0.1)
     
     # Respond to second a30802 with flag 80 (sequence 54)
-    client.send("00a3030800000009a30802540204000080")
+    client.send(SETUP_08_RESPONSE_80)
     time.sleep(0.1)
     
     # Phase 3: Wait for SSID broadcasts
@@ -242,38 +296,35 @@ def replay_captured_sequence(client: IHUClient):
     print("  (VCM should send SSID broadcasts every 5 seconds)")
     
     # Wait for a broadcast
-    try:
-        client.sock.settimeout(10.0)
-        data, addr = client.sock.recvfrom(1024)
-        broadcast = parse_message(data.hex())
+    data = client.receive(10.0)
+    if data is not None:
+        broadcast = parse_bytes(data)
         print(f"  Received broadcast: {broadcast}")
-        client.send_ack(data.hex())
-    except socket.timeout:
+        client.send_ack(broadcast)
+    else:
         print("  No broadcast received (timeout)")
-    client.sock.settimeout(2.0)
     
     # Phase 4: Send WiFi password
     print("\n[Phase 4] WiFi Connection")
-    responses = client.send("00a4040800000018a408024b02020000086c61696b696e617319d195cdd185cc")
+    responses = client.send(WIFI_PASSWORD)
     time.sleep(0.1)
     
     # VCM will send connection requests, find and respond to a30802
     # Send response to complete connection
-    client.send("00a3030800000009a30802720204000080")
+    client.send(CONNECT_COMPLETE_RESPONSE)
     time.sleep(0.1)
     
     # Phase 5: Connected
     print("\n[Phase 5] WiFi Connected - waiting for connected broadcasts...")
-    try:
-        client.sock.settimeout(10.0)
-        data, addr = client.sock.recvfrom(1024)
-        broadcast = parse_message(data.hex())
+    data = client.receive(10.0)
+    if data is not None:
+        broadcast = parse_bytes(data)
         print(f"  Received connected broadcast: {broadcast}")
         
         # Check for status 40 (connected)
         if "40" in broadcast.data:
             print("  ✓ WiFi connection confirmed (status 40)")
-    except socket.timeout:
+    else:
         print("  No broadcast received (timeout)")
     
     print("\n" + "=" * 60)
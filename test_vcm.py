@@ -4,6 +4,7 @@ VCM Simulator Test Suite - Validates state machine against captured traffic
 """
 
 import unittest
+from unittest import mock
 import sys
 import os
 
@@ -11,11 +12,13 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from vcm_protocol import (
-    parse_message, create_message, create_ack, create_response,
+    parse_message, parse_bytes, create_message, create_ack, create_response,
+    response_template,
     VCMMessage, ACK_DATA, Headers, Subheaders, StandardMessages,
     decode_wifi_password_message
 )
 from vcm_state_machine import VCMStateMachine, VCMState
+import vcm_simulator
 
 
 class TestProtocolParsing(unittest.TestCase):
@@ -52,6 +55,12 @@ class TestProtocolParsing(unittest.TestCase):
         self.assertEqual(msg.sequence, 0)
         self.assertTrue(msg.is_broadcast)
     
+    def test_subheader_key(self):
+        """Test integer subheader keys match the generated constants"""
+        msg = parse_message("00a4040d00000008a40d002802000000")
+        self.assertEqual(msg.subheader_key, 0xa40d00)
+        self.assertEqual(msg.subheader_key, Subheaders.K_PING_0D)
+    
     def test_message_reconstruction(self):
         """Test that parsed message can be reconstructed"""
         original = "00a4040d00000008a40d002802000000"
@@ -60,6 +69,16 @@ class TestProtocolParsing(unittest.TestCase):
         
         self.assertEqual(original, reconstructed)
     
+    def test_parse_bytes(self):
+        """Test parsing a raw frame matches parsing its hex form"""
+        payload = "00a4040d00000008a40d002802000000"
+        msg = parse_bytes(bytes.fromhex(payload))
+        
+        self.assertIsNotNone(msg)
+        self.assertEqual(msg, parse_message(payload))
+        self.assertEqual(msg.raw_bytes, bytes.fromhex(payload))
+        self.assertIsNone(parse_bytes(b"\x00\xa4\x04"))
+    
     def test_decode_wifi_password(self):
         """Test decoding WiFi password from message"""
         payload = "00a4040800000018a408024b02020000086c61696b696e617319d195cdd185cc"
@@ -82,6 +101,13 @@ class TestACKGeneration(unittest.TestCase):
         self.assertEqual(ack.sequence, original.sequence)
         self.assertEqual(ack.data, ACK_DATA)
         self.assertTrue(ack.is_ack)
+    
+    def test_response_template(self):
+        """Test a prebuilt response builder matches create_response"""
+        original = parse_message("00a4040d00000008a40d002802000000")
+        build = response_template(StandardMessages.RESPONSE_00)
+        
+        self.assertEqual(build(original), create_response(original, StandardMessages.RESPONSE_00))
 
 
 class TestStateMachineTransitions(unittest.TestCase):
@@ -96,6 +122,11 @@ class TestStateMachineTransitions(unittest.TestCase):
         """Test initial state is IDLE"""
         self.assertEqual(self.sm.ctx.state, VCMState.IDLE)
     
+    def test_handler_table_covers_states(self):
+        """Test every state has a handler at its enum index"""
+        self.assertEqual(len(self.sm._state_handlers), len(VCMState))
+        self.assertEqual([s.value for s in VCMState], list(range(len(VCMState))))
+    
     def test_handshake_ping_0d(self):
         """Test response to ping 0d (a40d00)"""
         payload = "00a4040d00000008a40d002802000000"
@@ -116,6 +147,15 @@ class TestStateMachineTransitions(unittest.TestCase):
         self.assertTrue(responses[0].is_ack)
         self.assertTrue(responses[1].is_response)
     
+    def test_handshake_ping_bytes(self):
+        """Test raw datagram bytes are processed like hex payloads"""
+        payload = bytes.fromhex("00a4040d00000008a40d002802000000")
+        responses = self.sm.process_message(payload)
+        
+        self.assertEqual(len(responses), 2)
+        self.assertTrue(responses[0].is_ack)
+        self.assertTrue(responses[1].is_response)
+    
     def test_ack_not_responded(self):
         """Test that ACK messages are not responded to"""
         # First, trigger a normal message to get to a state
@@ -216,7 +256,7 @@ class TestCapturedTrafficReplay(unittest.TestCase):
         
         # Test tick generates broadcast
         import time
-        self.sm.ctx.last_broadcast_time = time.time() - 10  # Force broadcast
+        self.sm.ctx.last_broadcast_time = time.monotonic() - 10  # Force broadcast
         tick_messages = self.sm.tick()
         self.assertTrue(len(tick_messages) > 0, "Should generate SSID broadcast")
         broadcast = tick_messages[0]
@@ -246,7 +286,7 @@ class TestCapturedTrafficReplay(unittest.TestCase):
         print(f"✓ Successfully reached WIFI_CONNECTED state")
         
         # Test connected broadcast
-        self.sm.ctx.last_broadcast_time = time.time() - 10  # Force broadcast
+        self.sm.ctx.last_broadcast_time = time.monotonic() - 10  # Force broadcast
         tick_messages = self.sm.tick()
         self.assertTrue(len(tick_messages) > 0, "Should generate connected broadcast")
         broadcast = tick_messages[0]
@@ -287,6 +327,34 @@ class TestEdgeCases(unittest.TestCase):
             self.assertEqual(len(responses), 0, "ACK should not generate response")
 
 
+class TestAckCoalescing(unittest.TestCase):
+    """Test VCM_COALESCE_ACK datagram packing"""
+    
+    def setUp(self):
+        self.sm = VCMStateMachine()
+        self.protocol = vcm_simulator.VCMProtocol(self.sm)
+        self.datagrams = []
+        self.protocol._sendto = lambda data, addr: self.datagrams.append(data)
+    
+    def _send(self, payload: str):
+        with mock.patch.object(vcm_simulator, "COALESCE_ACK", True):
+            self.protocol.send_many(self.sm.process_message(payload))
+    
+    def test_ack_merged_with_own_response(self):
+        """Test that a ping ACK and its response share one datagram"""
+        self._send("00a4040d00000008a40d002802000000")
+        self.assertEqual(len(self.datagrams), 1)
+    
+    def test_ack_not_merged_with_unrelated_request(self):
+        """Test that the setup trigger ACK is not merged with the a31102 request"""
+        for payload in ("00a4040d00000008a40d002802000000", "00a3030f00000008a30f002902000000"):
+            self.sm.process_message(payload)
+        self._send("00a4040000000009a40002320202000020")
+        self.assertEqual(len(self.datagrams), 2)
+        self.assertTrue(parse_bytes(self.datagrams[0]).is_ack)
+        self.assertEqual(parse_bytes(self.datagrams[1]).subheader, "a31102")
+
+
 if __name__ == "__main__":
     # Run tests with verbosity
     unittest.main(verbosity=2)
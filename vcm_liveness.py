@@ -1,4 +1,5 @@
 import socket
+import sys
 import time
 
 # --- CONFIGURATION ---
@@ -13,13 +14,14 @@ interval_ms = 1000                # send every 1000ms (1 second)
 #     "02 06 01 00 03 00 00 00"
 # )
 
-# Base payload template (the dynamic byte will be inserted at position 11)
-vcm_payload_template = [
+# Base payload template (the dynamic byte will be inserted at position 11),
+# built once and updated in place
+vcm_payload_template = bytearray([
     0xff, 0xff, 0xff, 0x01, 0x00, 0x00, 0x00, 0x0c, 0xff, 0x01,
     0x06,
     0x00,  # This byte will be dynamically changed (starts at 0x00)
     0x02, 0x06, 0x01, 0x00, 0x01, 0x00, 0x00, 0x00
-]
+])
 
 # Initialize counter
 counter = 0x00
@@ -31,23 +33,28 @@ sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 print(f"Sending {len(vcm_payload_template)} bytes to {broadcast_ip}:{port} every {interval_ms}ms ...")
 print("Press Ctrl+C to stop")
 
+target = (broadcast_ip, port)
+interval_s = interval_ms / 1000.0           # convert ms to seconds
+# Update the status line about once a second; interval_ms = 0 sends as fast
+# as possible, so fall back to every 1000 packets
+status_every = max(1, 1000 // interval_ms) if interval_ms else 1000
+
 try:
     packet_count = 0
     while True:
-        # Update the dynamic byte at position 11
+        # Update the dynamic byte at position 11 and send
         vcm_payload_template[11] = counter
-        
-        # Convert to bytes and send
-        payload = bytes(vcm_payload_template)
-        sock.sendto(payload, (broadcast_ip, port))
+        sock.sendto(vcm_payload_template, target)
         
         packet_count += 1
-        print(f"Sent packet #{packet_count} (counter: 0x{counter:02x})", end='\r')
+        if packet_count % status_every == 0:
+            sys.stdout.write(f"Sent packet #{packet_count} (counter: 0x{counter:02x})\r")
+            sys.stdout.flush()
         
         # Increment counter and wrap around at 0xFF
-        counter = (counter + 1) % 0x100
+        counter = (counter + 1) & 0xff
         
-        time.sleep(interval_ms / 1000.0)  # convert ms to seconds
+        time.sleep(interval_s)
 except KeyboardInterrupt:
     print(f"\nStopped. Total packets sent: {packet_count}")
 finally:
@@ -3,8 +3,8 @@
 VCM Protocol - Message encoding/decoding utilities
 """
 
-from dataclasses import dataclass
-from typing import Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Union, Callable
 import struct
 
 
@@ -16,135 +16,213 @@ BROADCAST_PREFIX = "0205"
 CONNECTING_PREFIX = "02e0"
 
 
-@dataclass
+# Byte offsets of the fixed fields within a frame
+HEADER_END = 7        # Header: bytes 0-6
+LENGTH_OFFSET = 7     # Length: 1 byte
+SUBHEADER_OFFSET = 8  # Subheader: bytes 8-10
+SEQUENCE_OFFSET = 11  # Sequence: 1 byte
+DATA_OFFSET = 12      # Data: remaining bytes
+MIN_FRAME_LEN = 12    # Minimum: 7 + 1 + 3 + 1 = 12 bytes
+
+_ACK_DATA_BYTES = bytes.fromhex(ACK_DATA)
+_ACK_LEN_BYTE = bytes([3 + 1 + 4])  # subheader + sequence + ACK data
+
+# First two data bytes as an integer (VCMMessage.prefix2)
+PFX_REQ_00 = 0x0200
+PFX_REQ_02 = 0x0202
+PFX_RSP = 0x0204
+PFX_BRD = 0x0205
+_REQUEST_PREFIXES = frozenset({PFX_REQ_00, PFX_REQ_02})
+
+
+@dataclass(slots=True)
 class VCMMessage:
-    """Represents a parsed VCM protocol message"""
-    header: str          # 7 bytes hex
-    length: int          # 1 byte
-    subheader: str       # 3 bytes hex
-    sequence: int        # 1 byte
-    data: str            # Variable length hex
+    """Represents a parsed VCM protocol message, backed by the raw frame bytes"""
+    buf: bytes  # Complete frame as received / sent
+    
+    # Hex views, filled in on first access (cached_property needs a __dict__)
+    _subheader: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _data: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _raw: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def header(self) -> str:
+        """Header (7 bytes) as hex"""
+        return self.buf[:HEADER_END].hex()
+    
+    @property
+    def length(self) -> int:
+        """Length byte: subheader + sequence + data"""
+        return self.buf[LENGTH_OFFSET]
+    
+    @property
+    def subheader(self) -> str:
+        """Subheader (3 bytes) as hex"""
+        if self._subheader is None:
+            self._subheader = self.buf[SUBHEADER_OFFSET:SEQUENCE_OFFSET].hex()
+        return self._subheader
+    
+    @property
+    def subheader_key(self) -> int:
+        """Subheader as a 24-bit integer, for dict dispatch (Subheaders.K_*)"""
+        return int.from_bytes(self.buf[SUBHEADER_OFFSET:SEQUENCE_OFFSET], "big")
+    
+    @property
+    def sequence(self) -> int:
+        """Sequence byte"""
+        return self.buf[SEQUENCE_OFFSET]
+    
+    @property
+    def data(self) -> str:
+        """Variable length data as hex"""
+        if self._data is None:
+            self._data = self.buf[DATA_OFFSET:].hex()
+        return self._data
     
     @property
     def raw(self) -> str:
-        """Reconstruct raw hex payload"""
-        return f"{self.header}{self.length:02x}{self.subheader}{self.sequence:02x}{self.data}"
+        """Raw hex payload"""
+        if self._raw is None:
+            self._raw = self.buf.hex()
+        return self._raw
     
     @property
     def raw_bytes(self) -> bytes:
-        """Get raw bytes"""
-        return bytes.fromhex(self.raw)
+        """Get raw bytes (same object as buf; send paths read buf directly)"""
+        return self.buf
+    
+    @property
+    def prefix2(self) -> int:
+        """First two data bytes as a big-endian integer (PFX_* constants)"""
+        return int.from_bytes(self.buf[DATA_OFFSET:DATA_OFFSET + 2], "big")
     
     @property
     def is_ack(self) -> bool:
         """Check if this is an ACK message"""
-        return self.data == ACK_DATA
+        return self.buf[DATA_OFFSET:] == _ACK_DATA_BYTES
     
     @property
     def is_request(self) -> bool:
         """Check if this is a request (0200 or 0202)"""
-        return self.data.startswith("0200") or self.data.startswith("0202")
+        return self.prefix2 in _REQUEST_PREFIXES
     
     @property
     def is_response(self) -> bool:
         """Check if this is a response (0204)"""
-        return self.data.startswith("0204")
+        return self.prefix2 == PFX_RSP
     
     @property
     def is_broadcast(self) -> bool:
         """Check if this is a status broadcast (0205)"""
-        return self.data.startswith("0205")
+        return self.prefix2 == PFX_BRD
     
     @property
     def message_type(self) -> str:
         """Get message category from subheader (first 4 chars)"""
-        return self.subheader[:4] if len(self.subheader) >= 4 else ""
+        return self.subheader[:4]
     
     @property
     def operation(self) -> str:
         """Get operation type from subheader (last 2 chars)"""
-        return self.subheader[4:] if len(self.subheader) >= 6 else ""
+        return self.subheader[4:]
     
     def __str__(self) -> str:
         msg_type = "ACK" if self.is_ack else ("REQ" if self.is_request else ("RSP" if self.is_response else "BRD"))
         return f"VCMMessage(sub={self.subheader}, seq={self.sequence:02x}, type={msg_type}, data={self.data})"
 
 
-def parse_message(payload_hex: str) -> Optional[VCMMessage]:
+def parse_bytes(buf: bytes) -> Optional[VCMMessage]:
     """
-    Parse a hex payload string into a VCMMessage.
+    Parse a raw frame into a VCMMessage.
     
     Structure:
-    - Header: 7 bytes (14 hex chars)
-    - Length: 1 byte (2 hex chars)
-    - Subheader: 3 bytes (6 hex chars)
-    - Sequence: 1 byte (2 hex chars)
+    - Header: 7 bytes
+    - Length: 1 byte
+    - Subheader: 3 bytes
+    - Sequence: 1 byte
     - Data: Variable (remaining)
+    
+    The length check is the only validation needed: every field is read
+    straight from the bytes, so parsing a long enough frame cannot fail.
     """
-    if len(payload_hex) < 24:  # Minimum: 14 + 2 + 6 + 2 = 24
+    if len(buf) < MIN_FRAME_LEN:
+        return None
+    
+    return VCMMessage(bytes(buf))
+
+
+def parse_message(payload_hex: str) -> Optional[VCMMessage]:
+    """Parse a hex payload string into a VCMMessage"""
+    if len(payload_hex) < 2 * MIN_FRAME_LEN:  # Too short - no need to decode
         return None
     
+    # bytes.fromhex is the only step that can fail
     try:
-        header = payload_hex[:14]
-        length = int(payload_hex[14:16], 16)
-        subheader = payload_hex[16:22]
-        sequence = int(payload_hex[22:24], 16)
-        data = payload_hex[24:]
-        
-        return VCMMessage(
-            header=header,
-            length=length,
-            subheader=subheader,
-            sequence=sequence,
-            data=data
-        )
-    except (ValueError, IndexError):
+        buf = bytes.fromhex(payload_hex)
+    except ValueError:
         return None
+    
+    return parse_bytes(buf)
+
+
+def _as_bytes(value: Union[str, bytes]) -> bytes:
+    """Accept a hex string or already decoded bytes"""
+    return value if isinstance(value, bytes) else bytes.fromhex(value)
 
 
-def create_message(header: str, subheader: str, sequence: int, data: str) -> VCMMessage:
+def create_message(header: Union[str, bytes], subheader: Union[str, bytes],
+                   sequence: int, data: Union[str, bytes]) -> VCMMessage:
     """
     Create a new VCM message with correct length calculation.
     
     Length = len(subheader + sequence + data) in bytes
     """
-    # Calculate length: subheader(3) + sequence(1) + data(len/2)
-    data_len = len(data) // 2 if data else 0
-    length = 3 + 1 + data_len
+    data = _as_bytes(data)
+    # Calculate length: subheader(3) + sequence(1) + data
+    length = 3 + 1 + len(data)
     
     return VCMMessage(
-        header=header,
-        length=length,
-        subheader=subheader,
-        sequence=sequence,
-        data=data
+        _as_bytes(header) + bytes((length,)) + _as_bytes(subheader) + bytes((sequence,)) + data
     )
 
 
 def create_ack(original: VCMMessage) -> VCMMessage:
     """Create an ACK for an incoming message"""
-    return create_message(
-        header=original.header,
-        subheader=original.subheader,
-        sequence=original.sequence,
-        data=ACK_DATA
-    )
+    buf = original.buf
+    # Same header, subheader and sequence; only length and data change
+    return VCMMessage(buf[:HEADER_END] + _ACK_LEN_BYTE + buf[SUBHEADER_OFFSET:DATA_OFFSET] + _ACK_DATA_BYTES)
 
 
-def create_response(original: VCMMessage, response_data: str) -> VCMMessage:
+def create_response(original: VCMMessage, response_data: Union[str, bytes]) -> VCMMessage:
     """
     Create a response message based on an original request.
     Uses same header, subheader, and sequence.
     """
-    return create_message(
-        header=original.header,
-        subheader=original.subheader,
-        sequence=original.sequence,
-        data=response_data
+    buf = original.buf
+    response_data = _as_bytes(response_data)
+    return VCMMessage(
+        buf[:HEADER_END] + bytes((3 + 1 + len(response_data),))
+        + buf[SUBHEADER_OFFSET:DATA_OFFSET] + response_data
     )
 
 
-def create_broadcast(header: str, subheader: str, data: str) -> VCMMessage:
+def response_template(response_data: Union[str, bytes]) -> Callable[[VCMMessage], VCMMessage]:
+    """
+    Specialize create_response for fixed response data.
+    Returns a builder that only copies header, subheader and sequence from the request.
+    """
+    data = _as_bytes(response_data)
+    length = bytes((3 + 1 + len(data),))
+    
+    def build(original: VCMMessage) -> VCMMessage:
+        buf = original.buf
+        return VCMMessage(buf[:HEADER_END] + length + buf[SUBHEADER_OFFSET:DATA_OFFSET] + data)
+    
+    return build
+
+
+def create_broadcast(header: Union[str, bytes], subheader: Union[str, bytes],
+                     data: Union[str, bytes]) -> VCMMessage:
     """Create a broadcast/status message (sequence = 0)"""
     return create_message(
         header=header,
@@ -154,7 +232,8 @@ def create_broadcast(header: str, subheader: str, data: str) -> VCMMessage:
     )
 
 
-def create_request_to_ihu(header: str, subheader: str, sequence: int, data: str) -> VCMMessage:
+def create_request_to_ihu(header: Union[str, bytes], subheader: Union[str, bytes],
+                          sequence: int, data: Union[str, bytes]) -> VCMMessage:
     """Create a request message from VCM to IHU"""
     return create_message(
         header=header,
@@ -164,7 +243,24 @@ def create_request_to_ihu(header: str, subheader: str, sequence: int, data: str)
     )
 
 
+def _add_bytes_constants(cls: type) -> type:
+    """Add a decoded NAME_B sibling for every hex string constant NAME"""
+    for name, value in list(vars(cls).items()):
+        if name.isupper() and isinstance(value, str):
+            setattr(cls, f"{name}_B", bytes.fromhex(value))
+    return cls
+
+
+def _add_key_constants(cls: type) -> type:
+    """Add an integer K_NAME sibling for every hex string constant NAME"""
+    for name, value in list(vars(cls).items()):
+        if name.isupper() and isinstance(value, str):
+            setattr(cls, f"K_{name}", int(value, 16))
+    return cls
+
+
 # Header templates observed in packet capture
+@_add_bytes_constants
 class Headers:
     """Common header templates"""
     # Format: 00 XX XX YY 000000
@@ -183,9 +279,13 @@ class Headers:
     AA_0A_01 = "00aa0a0100000000"[:14]
     AA_0A_07 = "00aa0a0700000000"[:14]
     AB_0B_01 = "00ab0b0100000000"[:14]
+    
+    # Each header also has a decoded bytes sibling (A4_04_0D_B, ...)
 
 
 # Subheader definitions
+@_add_bytes_constants
+@_add_key_constants
 class Subheaders:
     """Known subheaders and their meanings"""
     # Handshake/ping
@@ -214,9 +314,13 @@ class Subheaders:
     CONN_AA01 = "aa0105"
     CONN_AA07 = "aa0705"
     CONN_AB01 = "ab0105"
+    
+    # Each subheader also has an integer K_ sibling (K_PING_0D = 0xa40d00, ...)
+    # and a decoded bytes sibling (PING_0D_B, ...)
 
 
 # Pre-defined messages for common operations
+@_add_bytes_constants
 class StandardMessages:
     """Standard message data patterns"""
     # Request patterns
@@ -243,6 +347,11 @@ class StandardMessages:
     # SSID data (from capture)
     SSID_SCANNING = "0205000000833a32b9ba30b9baa0"
     SSID_CONNECTED = "0205000040a33a32b9ba30b9b8b0"
+    
+    # Each constant also has a decoded bytes sibling (RESPONSE_00_B, ...)
+
+
+_WIFI_PASSWORD_PREFIX = b"\x02\x02\x00\x00"
 
 
 def decode_wifi_password_message(msg: VCMMessage) -> Tuple[Optional[str], Optional[bytes]]:
@@ -251,27 +360,24 @@ def decode_wifi_password_message(msg: VCMMessage) -> Tuple[Optional[str], Option
     Format: 0202000008 + length_byte + ssid/password + extra_data
     Returns (ssid_or_password, extra_bytes)
     """
-    if not msg.data.startswith("02020000"):
+    buf = msg.buf
+    if not buf.startswith(_WIFI_PASSWORD_PREFIX, DATA_OFFSET):
         return None, None
     
-    try:
-        # Skip 02020000 (4 bytes = 8 hex chars)
-        data_hex = msg.data[8:]
-        data_bytes = bytes.fromhex(data_hex)
-        
-        if len(data_bytes) < 1:
-            return None, None
-        
-        str_len = data_bytes[0]
-        if len(data_bytes) < 1 + str_len:
-            return None, None
-        
-        ssid_password = data_bytes[1:1+str_len].decode('utf-8', errors='replace')
-        extra = data_bytes[1+str_len:] if len(data_bytes) > 1+str_len else None
-        
-        return ssid_password, extra
-    except:
+    # Skip 02020000 (4 bytes)
+    start = DATA_OFFSET + 4
+    if len(buf) <= start:
         return None, None
+    
+    str_len = buf[start]
+    end = start + 1 + str_len
+    if len(buf) < end:
+        return None, None
+    
+    ssid_password = buf[start + 1:end].decode('utf-8', errors='replace')
+    extra = buf[end:] or None
+    
+    return ssid_password, extra
 
 
 def encode_wifi_status(connected: bool, ssid_data: str = "a33a32b9ba30b9b8b0") -> str:
@@ -8,20 +8,20 @@ accurately replicating real VCM behavior observed in packet captures.
 
 import asyncio
 import logging
+import os
 import sys
 import signal
-from typing import Optional, Tuple
-from datetime import datetime
+from typing import Optional, Tuple, FrozenSet, Callable, Sequence
 
-from vcm_protocol import VCMMessage, parse_message
+try:
+    # Optional faster event loop (POSIX only); stdlib asyncio otherwise
+    import uvloop
+except ImportError:
+    uvloop = None
+
+from vcm_protocol import VCMMessage
 from vcm_state_machine import VCMStateMachine, VCMState
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s.%(msecs)03d [%(levelname)s] %(message)s',
-    datefmt='%H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 # Network configuration
@@ -30,6 +30,18 @@ VCM_PORT = 50000
 IHU_IP = "198.18.34.1"
 IHU_PORT = 50000
 
+# Two existence broadcast frames copied from captured traffic (an IHU 0x03 and
+# a VCM 0x01 frame), ignored verbatim. vcm_liveness.py sends the same layout
+# with a changing counter byte, so its packets only match by coincidence.
+LIVENESS_PACKETS: FrozenSet[bytes] = frozenset({
+    bytes.fromhex("ffffff010000000cff0106140206010003000000"),
+    bytes.fromhex("ffffff010000000cff0106320206010001000000"),
+})
+
+# Experimental: pack an ACK and the response that follows it into one datagram.
+# Off by default - the real VCM sends them separately (see captures).
+COALESCE_ACK = os.environ.get("VCM_COALESCE_ACK") == "1"
+
 # Timing
 TICK_INTERVAL = 0.1  # 100ms tick for periodic events
 
@@ -42,52 +54,100 @@ class VCMProtocol(asyncio.DatagramProtocol):
         self.transport: Optional[asyncio.DatagramTransport] = None
         self.ihu_addr: Optional[Tuple[str, int]] = None
         
+        # Bound transport.sendto while connected, and where to send;
+        # default to broadcast until the IHU address is known
+        self._sendto: Optional[Callable[[bytes, Tuple[str, int]], None]] = None
+        self._target: Tuple[str, int] = (IHU_IP, IHU_PORT)
+        
         # Register send callback
         self.state_machine.set_send_callback(self._send_message)
     
     def connection_made(self, transport: asyncio.DatagramTransport):
         self.transport = transport
+        self._sendto = transport.sendto
         logger.info(f"VCM Simulator listening on {VCM_IP}:{VCM_PORT}")
     
     def datagram_received(self, data: bytes, addr: Tuple[str, int]):
         """Handle incoming UDP datagrams"""
         # Remember IHU address for responses
         self.ihu_addr = addr
-        
-        # Convert to hex string for processing
-        payload_hex = data.hex()
+        self._target = addr
         
         # Ignore liveness packets - no response needed
-        if payload_hex in ("ffffff010000000cff0106140206010003000000", "ffffff010000000cff0106320206010001000000"):
-            logger.debug(f"Ignoring liveness packet from {addr}")
+        if data in LIVENESS_PACKETS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Ignoring liveness packet from %s", addr)
             return
         
-        logger.debug(f"Received from {addr}: {payload_hex}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received from %s: %s", addr, data.hex())
         
-        # Process through state machine
-        responses = self.state_machine.process_message(payload_hex)
+        # Process the raw frame through state machine
+        responses = self.state_machine.process_message(data)
         
         # Send responses
-        for response in responses:
-            self._send_message(response)
+        if responses:
+            self.send_many(responses)
     
     def _send_message(self, msg: VCMMessage):
         """Send a VCM message to IHU"""
-        if not self.transport:
+        sendto = self._sendto
+        if sendto is None:
             logger.error("Transport not available")
             return
         
-        # Default to broadcast if no IHU address known
-        target_addr = self.ihu_addr or (IHU_IP, IHU_PORT)
+        target_addr = self._target
+        sendto(msg.buf, target_addr)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sent to %s: %s", target_addr, msg.raw)
+    
+    def send_many(self, msgs: Sequence[VCMMessage]):
+        """Send several VCM messages to IHU, resolving transport and target once"""
+        sendto = self._sendto
+        if sendto is None:
+            logger.error("Transport not available")
+            return
+        
+        target_addr = self._target
+        if COALESCE_ACK:
+            self._send_coalesced(msgs, sendto, target_addr)
+        else:
+            # Each message is its own datagram, so one sendto per message
+            for msg in msgs:
+                sendto(msg.buf, target_addr)
         
-        payload_bytes = msg.raw_bytes
-        self.transport.sendto(payload_bytes, target_addr)
-        logger.debug(f"Sent to {target_addr}: {msg.raw}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for msg in msgs:
+                logger.debug("Sent to %s: %s", target_addr, msg.raw)
+    
+    @staticmethod
+    def _is_reply_pair(ack: VCMMessage, rsp: VCMMessage) -> bool:
+        """Check that rsp answers the same message that ack acknowledges"""
+        return (not rsp.is_ack
+                and rsp.subheader_key == ack.subheader_key
+                and rsp.sequence == ack.sequence)
+    
+    def _send_coalesced(self, msgs: Sequence[VCMMessage],
+                        sendto: Callable[[bytes, Tuple[str, int]], None],
+                        target_addr: Tuple[str, int]):
+        """Send messages, merging each ACK with its own response when it follows directly"""
+        i = 0
+        count = len(msgs)
+        while i < count:
+            msg = msgs[i]
+            if msg.is_ack and i + 1 < count and self._is_reply_pair(msg, msgs[i + 1]):
+                # ACK and response as one datagram (VCM_COALESCE_ACK)
+                sendto(msg.buf + msgs[i + 1].buf, target_addr)
+                i += 2
+            else:
+                sendto(msg.buf, target_addr)
+                i += 1
     
     def error_received(self, exc):
         logger.error(f"Error received: {exc}")
     
     def connection_lost(self, exc):
+        self._sendto = None
         logger.info("Connection closed")
 
 
@@ -130,20 +190,29 @@ class VCMSimulator:
     
     async def _tick_loop(self):
         """Periodic tick for broadcasts and timed events"""
+        loop = asyncio.get_running_loop()
+        now = loop.time
+        tick = self.state_machine.tick
+        
+        # Sleep until fixed deadlines so time spent ticking doesn't add drift
+        deadline = now()
         while self.running:
             try:
                 # Call state machine tick
-                messages = self.state_machine.tick()
+                messages = tick()
                 
                 # Send any periodic messages
-                for msg in messages:
-                    if self.protocol:
-                        self.protocol._send_message(msg)
+                if messages and self.protocol:
+                    self.protocol.send_many(messages)
                 
-                # Log state changes
-                current_state = self.state_machine.ctx.state
+                deadline += TICK_INTERVAL
+                delay = deadline - now()
+                if delay < -TICK_INTERVAL:
+                    # Fell more than a tick behind: resync instead of bursting
+                    deadline = now()
+                    delay = 0
                 
-                await asyncio.sleep(TICK_INTERVAL)
+                await asyncio.sleep(max(0, delay))
                 
             except asyncio.CancelledError:
                 break
@@ -179,6 +248,17 @@ class VCMSimulator:
 
 async def main():
     """Main entry point"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s.%(msecs)03d [%(levelname)s] %(message)s',
+        datefmt='%H:%M:%S'
+    )
+    # Skip gathering record fields the log format never shows
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     # Parse command line args
     bind_ip = "0.0.0.0"
     bind_port = VCM_PORT
@@ -220,4 +300,12 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None and sys.platform != 'win32':
+        if hasattr(uvloop, "run"):
+            uvloop.run(main())
+        else:
+            # uvloop < 0.18 has no run(); install its event loop policy instead
+            uvloop.install()
+            asyncio.run(main())
+    else:
+        asyncio.run(main())
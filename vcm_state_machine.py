@@ -3,33 +3,78 @@
 VCM State Machine - Core state management and transitions
 """
 
-from enum import Enum, auto
-from dataclasses import dataclass, field
-from typing import List, Callable, Optional, Dict, Any
+from enum import IntEnum
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Callable, Optional, Dict, Any, Union, Tuple, Sequence
 import time
 import logging
 
 from vcm_protocol import (
-    VCMMessage, parse_message, create_ack, create_message, create_response,
-    create_broadcast, create_request_to_ihu,
+    VCMMessage, parse_message, parse_bytes, create_ack, create_message, create_response,
+    create_broadcast, create_request_to_ihu, response_template,
     Headers, Subheaders, StandardMessages,
     decode_wifi_password_message, encode_wifi_status
 )
 
 logger = logging.getLogger(__name__)
 
+# Ping response builders keyed by subheader_key, generated once at import
+_PING_RESPONSES: Dict[int, Callable[[VCMMessage], VCMMessage]] = {
+    key: response_template(data)
+    for key, data in (
+        (Subheaders.K_PING_0D, StandardMessages.RESPONSE_00_B),
+        (Subheaders.K_PING_0F, StandardMessages.RESPONSE_SHORT_B),
+    )
+}
 
-class VCMState(Enum):
-    """VCM operational states"""
-    IDLE = auto()           # Initial state, waiting for IHU
-    HANDSHAKE = auto()      # Responding to ping messages
-    SETUP = auto()          # Complex setup sequence
-    WIFI_SCANNING = auto()  # Broadcasting SSID scan results
-    WIFI_CONNECTING = auto()  # Processing WiFi password
-    WIFI_CONNECTED = auto()   # Connected, broadcasting status
+# Shared "nothing to send" result, so no-op paths don't allocate a list
+_EMPTY: Tuple[VCMMessage, ...] = ()
 
+# Subheader keys of the keep-alive pings answered in every state
+_PING_SUBHEADERS = frozenset({Subheaders.K_PING_0D, Subheaders.K_PING_0F})
 
-@dataclass
+# One bit per ping type for tracking handshake progress
+_HANDSHAKE_BITS = {Subheaders.K_PING_0D: 1, Subheaders.K_PING_0F: 2}
+_HANDSHAKE_ALL = 1 | 2
+
+
+class VCMState(IntEnum):
+    """VCM operational states (contiguous, so they index the handler table)"""
+    IDLE = 0             # Initial state, waiting for IHU
+    HANDSHAKE = 1        # Responding to ping messages
+    SETUP = 2            # Complex setup sequence
+    WIFI_SCANNING = 3    # Broadcasting SSID scan results
+    WIFI_CONNECTING = 4  # Processing WiFi password
+    WIFI_CONNECTED = 5   # Connected, broadcasting status
+
+
+# States that send periodic SSID broadcasts
+_BROADCAST_STATES = frozenset({VCMState.WIFI_SCANNING, VCMState.WIFI_CONNECTED})
+
+# State names indexed by value, for log lines on the per-message path
+_STATE_NAMES: Tuple[str, ...] = tuple(s.name for s in VCMState)
+
+# SSID broadcasts are static per state (sequence 0), so they are built once
+_SSID_BROADCASTS: Dict[VCMState, VCMMessage] = {
+    # Scanning - not connected
+    VCMState.WIFI_SCANNING: create_message(
+        header=Headers.A4_04_0D_B,
+        subheader=Subheaders.WIFI_SCAN_B,
+        sequence=0,
+        data=StandardMessages.SSID_SCANNING_B
+    ),
+    # Connected
+    VCMState.WIFI_CONNECTED: create_message(
+        header=Headers.A4_04_0D_B,
+        subheader=Subheaders.WIFI_SCAN_B,
+        sequence=0,
+        data=StandardMessages.SSID_CONNECTED_B
+    ),
+}
+
+
+@dataclass(slots=True)
 class VCMContext:
     """Shared context for state machine"""
     state: VCMState = VCMState.IDLE
@@ -47,12 +92,12 @@ class VCMContext:
     wifi_password: str = ""
     wifi_connected: bool = False
     
-    # Timing
+    # Timing (time.monotonic() seconds)
     last_broadcast_time: float = 0
     broadcast_interval: float = 5.0
     
-    # Pending responses (for multi-message sequences)
-    pending_responses: List[VCMMessage] = field(default_factory=list)
+    # Pending responses (for multi-message sequences), None until needed
+    pending_responses: Optional[List[VCMMessage]] = None
     
     # Message send callback (set by simulator)
     send_callback: Optional[Callable[[VCMMessage], None]] = None
@@ -60,7 +105,7 @@ class VCMContext:
     def get_next_sequence(self) -> int:
         """Get next VCM-initiated sequence number"""
         seq = self.next_vcm_sequence
-        self.next_vcm_sequence = (self.next_vcm_sequence + 1) % 256
+        self.next_vcm_sequence = (seq + 1) & 0xff  # Wrap at one byte
         return seq
 
 
@@ -71,25 +116,50 @@ class VCMStateMachine:
     Handles state transitions and message processing for VCM simulation.
     """
     
+    __slots__ = (
+        'ctx', '_state_handlers',
+        '_handshake_count', '_handshake_mask',
+        '_setup_phase', '_setup_transitions', '_awaiting_ihu_response',
+        '_wifi_connect_sequence', '_connection_complete_seq',
+    )
+    
     def __init__(self):
         self.ctx = VCMContext()
-        self._state_handlers: Dict[VCMState, Callable] = {
-            VCMState.IDLE: self._handle_idle,
-            VCMState.HANDSHAKE: self._handle_handshake,
-            VCMState.SETUP: self._handle_setup,
-            VCMState.WIFI_SCANNING: self._handle_wifi_scanning,
-            VCMState.WIFI_CONNECTING: self._handle_wifi_connecting,
-            VCMState.WIFI_CONNECTED: self._handle_wifi_connected,
-        }
+        # Indexed by VCMState value - keep in enum order
+        self._state_handlers: Tuple[Callable[[VCMMessage], Sequence[VCMMessage]], ...] = (
+            self._handle_idle,             # IDLE
+            self._handle_handshake,        # HANDSHAKE
+            self._handle_setup,            # SETUP
+            self._handle_wifi_scanning,    # WIFI_SCANNING
+            self._handle_wifi_connecting,  # WIFI_CONNECTING
+            self._handle_wifi_connected,   # WIFI_CONNECTED
+        )
         
         # Track handshake completion
         self._handshake_count = 0
-        self._handshake_messages_seen = set()
+        self._handshake_mask = 0  # _HANDSHAKE_BITS of the ping types seen
         
         # Setup phase tracking
         self._setup_phase = 0
         self._awaiting_ihu_response = False
         
+        # (subheader_key, phase or None for any) of the IHU response
+        #   -> (next phase, messages to send next)
+        self._setup_transitions: Dict[Tuple[int, Optional[int]], Tuple[int, Callable[[], List[VCMMessage]]]] = {
+            # IHU responded to a31102, send next: a31002
+            (Subheaders.K_SETUP_11, None): (1, partial(self._send_setup_phase, 1)),
+            # IHU responded to a31002, send next: a30802
+            (Subheaders.K_SETUP_10, None): (2, partial(self._send_setup_phase, 2)),
+            # First a30802 response - send broadcasts and another a30802
+            (Subheaders.K_SETUP_08, 2): (3, partial(self._send_setup_phase, 3)),
+            # Second a30802 response - complete setup
+            (Subheaders.K_SETUP_08, 3): (4, self._complete_setup),
+        }
+        
+        # WiFi connection tracking
+        self._wifi_connect_sequence = 0
+        self._connection_complete_seq = 0
+        
     def set_send_callback(self, callback: Callable[[VCMMessage], None]):
         """Set the callback for sending messages"""
         self.ctx.send_callback = callback
@@ -97,123 +167,98 @@ class VCMStateMachine:
     def _send(self, msg: VCMMessage):
         """Send a message via callback"""
         if self.ctx.send_callback:
-            logger.info(f"VCM SEND: {msg}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("VCM SEND: %s", msg)
             self.ctx.send_callback(msg)
         else:
-            logger.warning(f"No send callback set, dropping: {msg}")
+            logger.warning("No send callback set, dropping: %s", msg)
             
-    def process_message(self, payload_hex: str) -> List[VCMMessage]:
+    def process_message(self, payload: Union[bytes, str]) -> Sequence[VCMMessage]:
         """
-        Process an incoming message and return responses.
+        Process an incoming message (raw frame or hex string) and return responses.
         
-        Returns list of messages to send (may be empty for ACKs).
+        Returns messages to send (the shared empty tuple for ACKs and no-ops).
         """
-        msg = parse_message(payload_hex)
+        msg = parse_bytes(payload) if isinstance(payload, bytes) else parse_message(payload)
         if not msg:
-            logger.warning(f"Failed to parse message: {payload_hex}")
-            return []
+            logger.warning("Failed to parse message: %r", payload)
+            return _EMPTY
         
-        logger.info(f"VCM RECV: {msg} (state={self.ctx.state.name})")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("VCM RECV: %s (state=%s)", msg, _STATE_NAMES[self.ctx.state])
         
         # CRITICAL: Never respond to ACKs
         if msg.is_ack:
-            logger.debug(f"Received ACK, not responding")
-            return []
+            logger.debug("Received ACK, not responding")
+            return _EMPTY
         
         # Track sequence numbers from IHU
         if msg.sequence != 0:
             self.ctx.last_ihu_sequence = msg.sequence
         
         # Get handler for current state
-        handler = self._state_handlers.get(self.ctx.state)
-        if handler:
-            responses = handler(msg)
-            return responses if responses else []
-        
-        return []
+        return self._state_handlers[self.ctx.state](msg)
     
-    def tick(self) -> List[VCMMessage]:
+    def tick(self) -> Sequence[VCMMessage]:
         """
         Called periodically to handle timed events (broadcasts).
         Returns messages to send.
         """
-        responses = []
-        current_time = time.time()
-        
-        # Handle periodic broadcasts based on state
-        if self.ctx.state in (VCMState.WIFI_SCANNING, VCMState.WIFI_CONNECTED):
-            if current_time - self.ctx.last_broadcast_time >= self.ctx.broadcast_interval:
-                self.ctx.last_broadcast_time = current_time
-                broadcast = self._create_ssid_broadcast()
-                if broadcast:
-                    responses.append(broadcast)
-        
-        return responses
+        ctx = self.ctx
+        # Only the broadcasting states have timed events
+        if ctx.state not in _BROADCAST_STATES:
+            return _EMPTY
+        
+        current_time = time.monotonic()
+        if current_time - ctx.last_broadcast_time < ctx.broadcast_interval:
+            return _EMPTY
+        
+        ctx.last_broadcast_time = current_time
+        broadcast = self._create_ssid_broadcast()
+        return (broadcast,) if broadcast else _EMPTY
     
     def _create_ssid_broadcast(self) -> Optional[VCMMessage]:
-        """Create SSID broadcast message based on connection state"""
-        if self.ctx.state == VCMState.WIFI_SCANNING:
-            # Scanning - not connected
-            return create_message(
-                header=Headers.A4_04_0D,
-                subheader=Subheaders.WIFI_SCAN,
-                sequence=0,
-                data=StandardMessages.SSID_SCANNING
-            )
-        elif self.ctx.state == VCMState.WIFI_CONNECTED:
-            # Connected
-            return create_message(
-                header=Headers.A4_04_0D,
-                subheader=Subheaders.WIFI_SCAN,
-                sequence=0,
-                data=StandardMessages.SSID_CONNECTED
-            )
-        return None
+        """Get the SSID broadcast message for the current connection state"""
+        return _SSID_BROADCASTS.get(self.ctx.state)
+    
+    def _respond_ping(self, msg: VCMMessage) -> List[VCMMessage]:
+        """ACK and status response for a ping"""
+        return [create_ack(msg), _PING_RESPONSES[msg.subheader_key](msg)]
     
     # ==================== State Handlers ====================
     
-    def _handle_idle(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_idle(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in IDLE state"""
-        responses = []
+        responses = _EMPTY
         
         # Respond to handshake pings
-        if msg.subheader in (Subheaders.PING_0D, Subheaders.PING_0F):
-            # Send ACK first
-            responses.append(create_ack(msg))
-            
-            # Send response with status
-            if msg.subheader == Subheaders.PING_0D:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_00))
-            else:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_SHORT))
+        if msg.subheader_key in _PING_SUBHEADERS:
+            # Send ACK first, then response with status
+            responses = self._respond_ping(msg)
             
             # Track handshake progress
-            self._handshake_messages_seen.add(msg.subheader)
+            self._handshake_mask |= _HANDSHAKE_BITS[msg.subheader_key]
             self._handshake_count += 1
             
             # After seeing both types twice, transition to HANDSHAKE
-            if len(self._handshake_messages_seen) >= 2 and self._handshake_count >= 2:
+            if self._handshake_mask == _HANDSHAKE_ALL and self._handshake_count >= 2:
                 logger.info("Handshake detected, transitioning to HANDSHAKE state")
                 self.ctx.state = VCMState.HANDSHAKE
         
         return responses
     
-    def _handle_handshake(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_handshake(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in HANDSHAKE state"""
-        responses = []
-        
         # Continue responding to pings
-        if msg.subheader in (Subheaders.PING_0D, Subheaders.PING_0F):
-            responses.append(create_ack(msg))
-            if msg.subheader == Subheaders.PING_0D:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_00))
-            else:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_SHORT))
+        if msg.subheader_key in _PING_SUBHEADERS:
+            return self._respond_ping(msg)
+        
+        responses = _EMPTY
         
         # Setup trigger: a40002 with 0202000020
-        elif msg.subheader == Subheaders.SETUP_TRIGGER and msg.data == StandardMessages.REQUEST_20:
+        if msg.subheader == Subheaders.SETUP_TRIGGER and msg.data == StandardMessages.REQUEST_20:
             logger.info("Setup sequence triggered!")
-            responses.append(create_ack(msg))
+            responses = [create_ack(msg)]
             
             # Store for later completion
             self.ctx.setup_trigger_msg = msg
@@ -229,35 +274,22 @@ class VCMStateMachine:
         
         return responses
     
-    def _handle_setup(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_setup(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in SETUP state - complex multi-step sequence"""
-        responses = []
+        responses = _EMPTY
         
         # Handle IHU responses to our setup requests
         if msg.is_response:
-            responses.append(create_ack(msg))
+            responses = [create_ack(msg)]
             
-            # Progress through setup phases
-            if msg.subheader == Subheaders.SETUP_11:
-                # IHU responded to a31102, send next: a31002
-                self._setup_phase = 1
-                responses.extend(self._send_setup_phase(1))
-                
-            elif msg.subheader == Subheaders.SETUP_10:
-                # IHU responded to a31002, send next: a30802
-                self._setup_phase = 2
-                responses.extend(self._send_setup_phase(2))
-                
-            elif msg.subheader == Subheaders.SETUP_08:
-                # IHU responded to a30802
-                if self._setup_phase == 2:
-                    # First a30802 response - send broadcasts and another a30802
-                    self._setup_phase = 3
-                    responses.extend(self._send_setup_phase(3))
-                elif self._setup_phase == 3:
-                    # Second a30802 response - complete setup
-                    self._setup_phase = 4
-                    responses.extend(self._complete_setup())
+            # Progress through setup phases; a30802 is answered twice, so its
+            # transition also depends on the current phase
+            key = msg.subheader_key
+            phase = self._setup_phase if key == Subheaders.K_SETUP_08 else None
+            transition = self._setup_transitions.get((key, phase))
+            if transition:
+                self._setup_phase, emit = transition
+                responses.extend(emit())
         
         return responses
     
@@ -268,10 +300,10 @@ class VCMStateMachine:
         # First request: a31102 with sequence 0x50
         seq = self.ctx.get_next_sequence()
         msg = create_request_to_ihu(
-            header="00a3031100000000"[:14],
-            subheader=Subheaders.SETUP_11,
+            header=Headers.A3_03_11_B,
+            subheader=Subheaders.SETUP_11_B,
             sequence=seq,
-            data=StandardMessages.REQUEST_00
+            data=StandardMessages.REQUEST_00_B
         )
         responses.append(msg)
         
@@ -285,43 +317,43 @@ class VCMStateMachine:
         if phase == 1:
             # Send a31002 request
             msg = create_request_to_ihu(
-                header="00a3031000000000"[:14],
-                subheader=Subheaders.SETUP_10,
+                header=Headers.A3_03_10_B,
+                subheader=Subheaders.SETUP_10_B,
                 sequence=seq,
-                data=StandardMessages.REQUEST_00
+                data=StandardMessages.REQUEST_00_B
             )
             responses.append(msg)
             
         elif phase == 2:
             # Send first a30802 request
             msg = create_request_to_ihu(
-                header=Headers.A3_03_08,
-                subheader=Subheaders.SETUP_08,
+                header=Headers.A3_03_08_B,
+                subheader=Subheaders.SETUP_08_B,
                 sequence=seq,
-                data=StandardMessages.REQUEST_00
+                data=StandardMessages.REQUEST_00_B
             )
             responses.append(msg)
             
         elif phase == 3:
             # Send status broadcasts
             responses.append(create_broadcast(
-                header=Headers.A3_03_0A,
-                subheader=Subheaders.STATUS_0A,
-                data=StandardMessages.BROADCAST_00
+                header=Headers.A3_03_0A_B,
+                subheader=Subheaders.STATUS_0A_B,
+                data=StandardMessages.BROADCAST_00_B
             ))
             responses.append(create_broadcast(
-                header="00a4040000000000"[:14],
-                subheader=Subheaders.STATUS_00,
-                data=StandardMessages.BROADCAST_20
+                header=Headers.A4_04_00_B,
+                subheader=Subheaders.STATUS_00_B,
+                data=StandardMessages.BROADCAST_20_B
             ))
             
             # Send second a30802 request (with flag 80)
             seq = self.ctx.get_next_sequence()
             msg = create_request_to_ihu(
-                header=Headers.A3_03_08,
-                subheader=Subheaders.SETUP_08,
+                header=Headers.A3_03_08_B,
+                subheader=Subheaders.SETUP_08_B,
                 sequence=seq,
-                data=StandardMessages.REQUEST_80
+                data=StandardMessages.REQUEST_80_B
             )
             responses.append(msg)
         
@@ -333,47 +365,43 @@ class VCMStateMachine:
         
         # Send another status broadcast
         responses.append(create_broadcast(
-            header="00a4040000000000"[:14],
-            subheader=Subheaders.STATUS_00,
-            data=StandardMessages.BROADCAST_20
+            header=Headers.A4_04_00_B,
+            subheader=Subheaders.STATUS_00_B,
+            data=StandardMessages.BROADCAST_20_B
         ))
         
         # Send completion response for original setup trigger
         if self.ctx.setup_trigger_msg:
             completion = create_response(
                 self.ctx.setup_trigger_msg,
-                StandardMessages.RESPONSE_20
+                StandardMessages.RESPONSE_20_B
             )
             responses.append(completion)
         
         # Transition to WiFi scanning
         logger.info("Setup complete, transitioning to WIFI_SCANNING")
         self.ctx.state = VCMState.WIFI_SCANNING
-        self.ctx.last_broadcast_time = time.time()  # Start broadcast timer
+        self.ctx.last_broadcast_time = time.monotonic()  # Start broadcast timer
         
         return responses
     
-    def _handle_wifi_scanning(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_wifi_scanning(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in WIFI_SCANNING state"""
-        responses = []
-        
         # Handle pings (keep-alive)
-        if msg.subheader in (Subheaders.PING_0D, Subheaders.PING_0F):
-            responses.append(create_ack(msg))
-            if msg.subheader == Subheaders.PING_0D:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_00))
-            else:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_SHORT))
+        if msg.subheader_key in _PING_SUBHEADERS:
+            return self._respond_ping(msg)
+        
+        responses = _EMPTY
         
         # WiFi password received
-        elif msg.subheader == Subheaders.WIFI_PASSWORD and msg.is_request:
+        if msg.subheader == Subheaders.WIFI_PASSWORD and msg.is_request:
             logger.info("WiFi password received, transitioning to WIFI_CONNECTING")
-            responses.append(create_ack(msg))
+            responses = [create_ack(msg)]
             
             # Decode password
             password, extra = decode_wifi_password_message(msg)
             if password:
-                logger.info(f"WiFi password decoded: {password}")
+                logger.info("WiFi password decoded: %s", password)
                 self.ctx.wifi_password = password
             
             # Store sequence for responses
@@ -390,44 +418,44 @@ class VCMStateMachine:
         responses = []
         
         # Send connecting status: 02e0000048
-        responses.append(create_response(password_msg, StandardMessages.WIFI_CONNECTING))
+        responses.append(create_response(password_msg, StandardMessages.WIFI_CONNECTING_B))
         
         # Send status update: a30a05 with flag 80
         responses.append(create_broadcast(
-            header=Headers.A3_03_0A,
-            subheader=Subheaders.STATUS_0A,
-            data=StandardMessages.BROADCAST_80
+            header=Headers.A3_03_0A_B,
+            subheader=Subheaders.STATUS_0A_B,
+            data=StandardMessages.BROADCAST_80_B
         ))
         
         # Send password accepted response with connection data
         responses.append(create_message(
-            header=Headers.A4_04_08,
-            subheader=Subheaders.WIFI_PASSWORD,
+            header=Headers.A4_04_08_B,
+            subheader=Subheaders.WIFI_PASSWORD_B,
             sequence=password_msg.sequence,
             data="020400000ce8cae6e8c2e680"  # From capture
         ))
         
         # Send connection info messages
         responses.append(create_broadcast(
-            header=Headers.AA_0A_01,
-            subheader=Subheaders.CONN_AA01,
-            data=StandardMessages.BROADCAST_40
+            header=Headers.AA_0A_01_B,
+            subheader=Subheaders.CONN_AA01_B,
+            data=StandardMessages.BROADCAST_40_B
         ))
         responses.append(create_broadcast(
-            header=Headers.AA_0A_07,
-            subheader=Subheaders.CONN_AA07,
-            data=StandardMessages.BROADCAST_40
+            header=Headers.AA_0A_07_B,
+            subheader=Subheaders.CONN_AA07_B,
+            data=StandardMessages.BROADCAST_40_B
         ))
         responses.append(create_broadcast(
-            header=Headers.AB_0B_01,
-            subheader=Subheaders.CONN_AB01,
-            data=StandardMessages.BROADCAST_00
+            header=Headers.AB_0B_01_B,
+            subheader=Subheaders.CONN_AB01_B,
+            data=StandardMessages.BROADCAST_00_B
         ))
         
         # Send WiFi status
         responses.append(create_broadcast(
-            header=Headers.A4_04_08,
-            subheader=Subheaders.WIFI_STATUS,
+            header=Headers.A4_04_08_B,
+            subheader=Subheaders.WIFI_STATUS_B,
             data="020500000ce8cae6e8c2e680"  # From capture
         ))
         
@@ -435,26 +463,26 @@ class VCMStateMachine:
         seq = self.ctx.get_next_sequence()
         self._connection_complete_seq = seq
         responses.append(create_request_to_ihu(
-            header=Headers.A3_03_08,
-            subheader=Subheaders.SETUP_08,
+            header=Headers.A3_03_08_B,
+            subheader=Subheaders.SETUP_08_B,
             sequence=seq,
-            data=StandardMessages.REQUEST_80
+            data=StandardMessages.REQUEST_80_B
         ))
         
         return responses
     
-    def _handle_wifi_connecting(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_wifi_connecting(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in WIFI_CONNECTING state"""
-        responses = []
+        responses = _EMPTY
         
         # Wait for IHU confirmation of connection complete (a30802 response)
         if msg.subheader == Subheaders.SETUP_08 and msg.is_response:
-            responses.append(create_ack(msg))
+            responses = [create_ack(msg)]
             
             # Send final status
             responses.append(create_broadcast(
-                header=Headers.A4_04_02,
-                subheader=Subheaders.WIFI_FINAL,
+                header=Headers.A4_04_02_B,
+                subheader=Subheaders.WIFI_FINAL_B,
                 data="020500001a"  # From capture
             ))
             
@@ -462,25 +490,19 @@ class VCMStateMachine:
             logger.info("WiFi connection confirmed, transitioning to WIFI_CONNECTED")
             self.ctx.state = VCMState.WIFI_CONNECTED
             self.ctx.wifi_connected = True
-            self.ctx.last_broadcast_time = time.time()
+            self.ctx.last_broadcast_time = time.monotonic()
         
         return responses
     
-    def _handle_wifi_connected(self, msg: VCMMessage) -> List[VCMMessage]:
+    def _handle_wifi_connected(self, msg: VCMMessage) -> Sequence[VCMMessage]:
         """Handle messages in WIFI_CONNECTED state"""
-        responses = []
-        
         # Handle pings
-        if msg.subheader in (Subheaders.PING_0D, Subheaders.PING_0F):
-            responses.append(create_ack(msg))
-            if msg.subheader == Subheaders.PING_0D:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_00))
-            else:
-                responses.append(create_response(msg, StandardMessages.RESPONSE_SHORT))
+        if msg.subheader_key in _PING_SUBHEADERS:
+            return self._respond_ping(msg)
         
         # Could add disconnect handling here
         
-        return responses
+        return _EMPTY
 
 
 def create_vcm_state_machine() -> VCMStateMachine: